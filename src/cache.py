@@ -1,70 +1,522 @@
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from datetime import datetime, timezone
+import heapq
 import json
 from pathlib import Path
+import os
+import tempfile
 import threading
 import re
 
+from compact_store import CANT_TRANSLATE, CompactStore, SnapshotWriter
+
 CACHE_DIR = Path("translation_cache")
 CACHE_DIR.mkdir(exist_ok=True)
 
 _lock = threading.Lock()
-_active_cache = {}
+_active_cache = CompactStore()
 _active_lang = None
 
+# In-process counters per language since startup: hits, misses, writes, removals
+_counters = defaultdict(Counter)
+
+
 HANDLEBAR_REGEX = re.compile(r"{{.*?}}")
 
+# Reused encoder for streaming writes; json.dumps builds a new one per call
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+# Encodes a whole dict in C with the same ",\n  " layout as the per-entry writer
+_encode_chunk = json.JSONEncoder(ensure_ascii=False, separators=(",\n  ", ": ")).encode
+# Bytes the encoder escapes; UTF-8 text without them is already a valid JSON string body
+_NEEDS_ESCAPE = re.compile(rb'["\\\x00-\x1f]')
+
+
+def _json_path(lang: str) -> Path:
+    return CACHE_DIR / f"{lang}.json"
+
+
+def _snapshot_path(lang: str) -> Path:
+    return CACHE_DIR / f"{lang}.snapshot"
+
+
+def _stamp(path: Path):
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _open_store(lang: str) -> CompactStore:
+    """
+    Open the cache for `lang` as a CompactStore.
+    The mmap snapshot is used when it matches the JSON file; otherwise it is
+    rebuilt from the JSON once, so only the first load pays for json.loads.
+    """
+    cache_file = _json_path(lang)
+    if not cache_file.exists():
+        return CompactStore()
+
+    stamp = _stamp(cache_file)
+    store = CompactStore.open(_snapshot_path(lang), stamp)
+    if store is not None:
+        return store
+
+    try:
+        data = json.loads(cache_file.read_text())
+    except Exception:
+        return CompactStore()
+
+    try:
+        CompactStore.write(_snapshot_path(lang), sorted(data.items()), stamp)
+        store = CompactStore.open(_snapshot_path(lang), stamp)
+    except Exception as ex:
+        print(f"[CACHE WARN] could not build snapshot for {lang}: {ex}")
+        store = None
+
+    return store if store is not None else CompactStore(data)
+
+
+class _CacheFileWriter:
+    """
+    Writes the JSON file and the snapshot for one language side by side into
+    temporary files. Untouched snapshot ranges are copied into the new snapshot
+    byte for byte and into the JSON in chunks, so a save costs little more than
+    copying the files plus encoding the changed entries.
+    """
+
+    # Snapshot entries per chunk when writing an untouched range as JSON
+    JSON_CHUNK = 20000
+
+    def __init__(self, lang: str):
+        fd, self.tmp_json = tempfile.mkstemp(dir=CACHE_DIR, prefix=f".{lang}.", suffix=".json.tmp")
+        self.tmp_snapshot = self.tmp_json[:-len(".json.tmp")] + ".snapshot.tmp"
+        self._json = os.fdopen(fd, "wb")
+        self._snapshot = SnapshotWriter()
+        self._empty = True
+        self._json.write(b"{")
+
+    def _write_json(self, body: bytes):
+        self._json.write((b"\n  " if self._empty else b",\n  ") + body)
+        self._empty = False
+
+    def add(self, key: str, value: str):
+        self._write_json(f"{_encode(key)}: {_encode(value)}".encode("utf-8"))
+        self._snapshot.add(key, value)
+
+    def add_range(self, store: CompactStore, i: int, j: int):
+        self._snapshot.add_range(store, i, j)
+
+        for start in range(i, j, self.JSON_CHUNK):
+            keys, values = store.raw_range(start, min(j, start + self.JSON_CHUNK))
+
+            if _NEEDS_ESCAPE.search(b"".join(keys)) or _NEEDS_ESCAPE.search(b"".join(values)):
+                chunk = {key.decode("utf-8"): value.decode("utf-8") for key, value in zip(keys, values)}
+                # Same layout as the per-entry path, minus the surrounding braces
+                self._write_json(_encode_chunk(chunk)[1:-1].encode("utf-8"))
+            else:
+                self._write_json(b",\n  ".join([b'"%s": "%s"' % pair for pair in zip(keys, values)]))
+
+    def finish(self, failed: int = None):
+        self._json.write(b"}" if self._empty else b"\n}")
+        self._json.close()
+        self._snapshot.finish(self.tmp_snapshot, _stamp(Path(self.tmp_json)), failed)
+        return self.tmp_json, self.tmp_snapshot
+
+    def discard(self):
+        self._json.close()
+        _discard_files(self.tmp_json, self.tmp_snapshot)
+
+
+def _write_temp_files(lang: str, items):
+    """
+    Stream sorted (key, value) pairs into a temporary JSON file and snapshot in
+    a single pass, with constant memory. Returns (tmp_json, tmp_snapshot); move
+    them into place with _install_files.
+    """
+    writer = _CacheFileWriter(lang)
+    try:
+        for key, value in items:
+            writer.add(key, value)
+        return writer.finish()
+    except BaseException:
+        writer.discard()
+        raise
+
+
+def _write_store_files(lang: str, store: CompactStore):
+    """Like _write_temp_files, but copies the snapshot ranges the overlay leaves untouched."""
+    writer = _CacheFileWriter(lang)
+    try:
+        for segment in store.segments():
+            if segment[0] == "range":
+                writer.add_range(store, segment[1], segment[2])
+            else:
+                writer.add(segment[1], segment[2])
+        # Copied ranges are not inspected; the store knows its total from the header and overlay
+        return writer.finish(store.count_value(CANT_TRANSLATE))
+    except BaseException:
+        writer.discard()
+        raise
+
+
+def _install_files(lang: str, tmp_json, tmp_snapshot):
+    os.replace(tmp_json, _json_path(lang))
+    os.replace(tmp_snapshot, _snapshot_path(lang))
+
+
+def _discard_files(*paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _current_stamp(lang: str):
+    cache_file = _json_path(lang)
+    return _stamp(cache_file) if cache_file.exists() else None
+
+
+# Times a write is redone without the lock when the cache changes underneath it
+WRITE_RETRIES = 3
+
+
+def _refresh_active(lang: str, source_store, copied):
+    """
+    Call under the lock after new files for `lang` were installed. If `lang` is
+    active, reopen it from the new snapshot and re-apply the unsaved changes made
+    since `copied` was taken from `source_store` (or all of them when the active
+    store has been reopened since, or the write did not come from it).
+    """
+    global _active_cache
+
+    if lang != _active_lang:
+        return
+
+    current = _active_cache.pending_changes()
+    later = _changes_since(copied, current) if _active_cache is source_store else current
+
+    _active_cache.close()
+    _active_cache = _open_store(lang)
+    _active_cache.apply_changes(*later)
+
+
+def _persist_once(lang: str, changes, source_store, lock) -> bool:
+    """
+    Fold `changes` (overlay, removed) into the files for `lang`. `lock` guards
+    opening the current snapshot and installing the result; the write itself
+    runs outside it. Returns False when the cache changed in between.
+    """
+    with lock:
+        stamp = _current_stamp(lang)
+        base = _open_store(lang)
+
+    try:
+        base.apply_changes(*changes)
+        tmp_files = _write_store_files(lang, base)
+    finally:
+        base.close()
+
+    with lock:
+        if _current_stamp(lang) != stamp:
+            _discard_files(*tmp_files)
+            return False
+
+        _install_files(lang, *tmp_files)
+        _refresh_active(lang, source_store, changes)
+
+    return True
+
+
+def _persist_changes(lang: str, changes, source_store=None):
+    """
+    Write `changes` for `lang` to disk without holding the global lock during
+    the write, so lookups from live requests are not blocked. Retries when
+    another writer got there first, then falls back to writing under the lock.
+    """
+    for _ in range(WRITE_RETRIES):
+        if _persist_once(lang, changes, source_store, _lock):
+            return
+        print(f"[CACHE] lang:{lang} changed during write, retrying")
+
+    with _lock:
+        _persist_once(lang, changes, source_store, nullcontext())
+
 
 def load_cache(lang: str):
     """Load only the cache for the target language."""
     global _active_cache, _active_lang
 
     with _lock:
+        _active_cache.close()
         _active_lang = lang
-        cache_file = CACHE_DIR / f"{lang}.json"
-
-        if cache_file.exists():
-            try:
-                _active_cache = json.loads(cache_file.read_text())
-            except Exception:
-                _active_cache = {}
-        else:
-            _active_cache = {}
+        _active_cache = _open_store(lang)
 
 
 def save_cache():
     """Write the active language cache back to disk."""
-    global _active_cache, _active_lang
-
-    if not _active_lang:
-        return
+    with _lock:
+        lang = _active_lang
+        # Nothing changed since the last load or save: the files are current
+        if not lang or _active_cache.overlay_size == 0:
+            return
 
-    cache_file = CACHE_DIR / f"{_active_lang}.json"
+        source_store = _active_cache
+        changes = source_store.pending_changes()
 
-    with _lock:
-        cache_file.write_text(
-            json.dumps(_active_cache, ensure_ascii=False, indent=2)
-        )
+    _persist_changes(lang, changes, source_store)
 
 
 def get_cached(word: str):
     with _lock:
-        return _active_cache.get(word)
+        value = _active_cache.get(word)
+        _counters[_active_lang]["hits" if value else "misses"] += 1
+        return value
 
 
 def set_cached(word: str, value: str):
     with _lock:
         _active_cache[word] = value
+        _counters[_active_lang]["writes"] += 1
 
 
 def remove_cached(word: str):
     with _lock:
         if word in _active_cache:
             del _active_cache[word]
+            _counters[_active_lang]["removals"] += 1
+
+
+def missing_keys(lang: str, keys):
+    """Return the keys that have no entry in the cache for `lang`."""
+    with _lock:
+        if lang == _active_lang:
+            return [key for key in keys if key not in _active_cache]
+
+        store = _open_store(lang)
+        try:
+            return [key for key in keys if key not in store]
+        finally:
+            store.close()
+
+
+def update_language_cache(lang: str, entries: dict, policy: str = "overwrite") -> int:
+    """
+    Merge `entries` into the cache for `lang` and persist it, whether or not
+    that language is the active one. Safe to call from a background thread.
+
+    With policy="keep", existing entries win unless they are "cant translate".
+    Returns the number of entries written.
+    """
+    if not entries:
+        return 0
+
+    with _lock:
+        is_active = lang == _active_lang
+        store = _active_cache if is_active else _open_store(lang)
+
+        selected = {}
+        for key, value in entries.items():
+            if policy == "keep" and store.get(key, CANT_TRANSLATE) != CANT_TRANSLATE:
+                continue
+            selected[key] = value
+
+        if is_active:
+            # Visible to live requests straight away
+            _active_cache.update(selected)
+        else:
+            store.close()
+
+    if not selected:
+        return 0
+
+    _persist_changes(lang, (selected, set()))
+    return len(selected)
+
+
+IMPORT_POLICIES = ("keep", "overwrite")
+IMPORT_BATCH_SIZE = 50000
+
+
+def import_entries(lang: str, entries, policy: str = "keep", skip_failures: bool = True) -> dict:
+    """
+    Stream (key, value) pairs into the cache for `lang` with constant memory.
+
+    Entries are collected in batches of IMPORT_BATCH_SIZE, each spilled to disk
+    as a sorted run file. The runs are then merged with the existing snapshot
+    in one pass that writes the new JSON and snapshot, so the cache is
+    rewritten once per import rather than once per batch.
+
+    policy: "keep" leaves existing translations alone (but replaces
+    "cant translate"), "overwrite" lets imported values win. When the import
+    itself repeats a key, the last occurrence wins.
+    skip_failures: drop imported "cant translate" values.
+    """
+    if policy not in IMPORT_POLICIES:
+        raise ValueError(f"policy must be one of {', '.join(IMPORT_POLICIES)}")
+
+    summary = {"read": 0, "imported": 0, "kept": 0, "skipped": 0}
+
+    with tempfile.TemporaryDirectory(dir=CACHE_DIR, prefix=".import-") as run_dir:
+        runs = []
+        batch = {}
+
+        for key, value in entries:
+            summary["read"] += 1
+
+            if not isinstance(key, str) or not isinstance(value, str) or not key:
+                summary["skipped"] += 1
+                continue
+            if skip_failures and value == CANT_TRANSLATE:
+                summary["skipped"] += 1
+                continue
+
+            batch[key] = value
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                runs.append(_write_run(run_dir, len(runs), batch))
+                batch.clear()
+
+        if batch:
+            runs.append(_write_run(run_dir, len(runs), batch))
+            batch.clear()
+
+        if runs:
+            summary.update(_merge_runs_into_cache(lang, runs, policy))
+
+    return summary
+
+
+def _write_run(run_dir: str, index: int, batch: dict) -> str:
+    path = os.path.join(run_dir, f"run-{index}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for key, value in sorted(batch.items()):
+            f.write(f"[{_encode(key)}, {_encode(value)}]\n")
+    return path
+
+
+def _read_run(path: str, index: int):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            key, value = json.loads(line)
+            yield key, index, value
+
+
+def _merge_runs(runs):
+    """Merge sorted run files into one sorted stream; later runs win on duplicate keys."""
+    previous = None
+    for key, _, value in heapq.merge(*(_read_run(path, i) for i, path in enumerate(runs))):
+        if previous is not None and previous[0] != key:
+            yield previous
+        previous = (key, value)
+
+    if previous is not None:
+        yield previous
+
+
+def _merge_import(existing, imported, policy: str, counts: dict):
+    """Merge two sorted (key, value) streams, applying the import policy on clashes."""
+    existing = iter(existing)
+    imported = iter(imported)
+    e = next(existing, None)
+    i = next(imported, None)
+
+    while e is not None or i is not None:
+        if i is None or (e is not None and e[0] < i[0]):
+            yield e
+            e = next(existing, None)
+        elif e is None or i[0] < e[0]:
+            counts["imported"] += 1
+            yield i
+            i = next(imported, None)
+        else:
+            if policy == "keep" and e[1] != CANT_TRANSLATE:
+                counts["kept"] += 1
+                yield e
+            else:
+                counts["imported"] += 1
+                yield i
+            e = next(existing, None)
+            i = next(imported, None)
+
+
+def _changes_since(before, after):
+    """Overlay changes made to the active store between two pending_changes() copies."""
+    overlay_before, removed_before = before
+    overlay_after, removed_after = after
+
+    overlay = {k: v for k, v in overlay_after.items() if overlay_before.get(k) != v}
+    removed = removed_after - removed_before
+    removed |= {k for k in overlay_before if k not in overlay_after and k not in removed_after}
+    return overlay, removed
+
+
+def _merge_once(lang: str, runs, policy: str, lock):
+    """
+    One merge attempt. `lock` guards taking a view of the cache and installing
+    the result; the merge itself runs outside it. Returns the counts, or None
+    when the cache changed in between and the result was discarded.
+    """
+    with lock:
+        stamp = _current_stamp(lang)
+        base = _open_store(lang)
+        source_store = _active_cache if lang == _active_lang else None
+        active_changes = source_store.pending_changes() if source_store is not None else ({}, set())
+        base.apply_changes(*active_changes)
+
+    counts = {"imported": 0, "kept": 0}
+    try:
+        merged = _merge_import(base.items(), _merge_runs(runs), policy, counts)
+        tmp_files = _write_temp_files(lang, merged)
+    finally:
+        base.close()
+
+    with lock:
+        if _current_stamp(lang) != stamp:
+            _discard_files(*tmp_files)
+            return None
+
+        _install_files(lang, *tmp_files)
+        # Re-apply anything set or removed on the active cache during the merge
+        _refresh_active(lang, source_store, active_changes)
+
+    return counts
+
+
+def _merge_runs_into_cache(lang: str, runs, policy: str) -> dict:
+    """
+    Merge import runs with the current cache for `lang` and install the result.
+    The global lock is only held to take a view of the cache and to swap the new
+    files in, so live translations are not blocked by the merge. If the cache is
+    written in between, the merge is redone, and after WRITE_RETRIES attempts
+    it runs under the lock.
+    """
+    for _ in range(WRITE_RETRIES):
+        counts = _merge_once(lang, runs, policy, _lock)
+        if counts is not None:
+            return counts
+        print(f"[CACHE IMPORT] lang:{lang} changed during merge, retrying")
+
+    with _lock:
+        return _merge_once(lang, runs, policy, nullcontext())
+
+
+def iter_entries(lang: str):
+    """
+    Yield the saved (key, value) pairs for `lang` in key order. The snapshot is
+    opened privately, so the cache lock is not held while the caller consumes it.
+    """
+    with _lock:
+        store = _open_store(lang)
+
+    try:
+        yield from store.items()
+    finally:
+        store.close()
 
 
 def clear_language_cache(lang: str):
-    file = CACHE_DIR / f"{lang}.json"
-    if file.exists():
-        file.unlink()
+    for file in (_json_path(lang), _snapshot_path(lang)):
+        if file.exists():
+            file.unlink()
 
 
 def find_differences(old_data, new_data):
@@ -120,3 +572,92 @@ def remove_differences_from_cache(differences, lang: str):
                 remove_cached(temp_value)
 
     save_cache()
+
+
+def cached_languages():
+    """Language codes that have a cache file on disk."""
+    return sorted(p.stem for p in CACHE_DIR.glob("*.json"))
+
+
+def _store_figures(store: CompactStore):
+    return len(store), store.count_value(CANT_TRANSLATE), store.overlay_size, store.memory_footprint()
+
+
+def language_stats(lang: str) -> dict:
+    """
+    Size and performance figures for one language cache. Entry counts come from
+    the snapshot (plus the unsaved overlay for the active language); only the
+    requested language is opened.
+    """
+    cache_file = _json_path(lang)
+    snapshot = _snapshot_path(lang)
+
+    with _lock:
+        counters = dict(_counters.get(lang, {}))
+        is_active = lang == _active_lang
+
+        if is_active:
+            # Cheap: the snapshot's figures come from its header, only the overlay is walked
+            entries, failed, unsaved, memory = _store_figures(_active_cache)
+        else:
+            store = _open_store(lang)
+
+    if not is_active:
+        # Nobody else holds this store, and its mapping survives the files being replaced
+        try:
+            entries, failed, unsaved, memory = _store_figures(store)
+        finally:
+            store.close()
+
+    hits = counters.get("hits", 0)
+    lookups = hits + counters.get("misses", 0)
+
+    last_write = None
+    if cache_file.exists():
+        last_write = datetime.fromtimestamp(cache_file.stat().st_mtime, timezone.utc).isoformat()
+
+    return {
+        "language": lang,
+        "active": is_active,
+        "entries": entries,
+        "cant_translate": failed,
+        "unsaved_changes": unsaved,
+        "hits": hits,
+        "misses": counters.get("misses", 0),
+        "writes": counters.get("writes", 0),
+        "removals": counters.get("removals", 0),
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        "last_write": last_write,
+        "json_bytes": cache_file.stat().st_size if cache_file.exists() else 0,
+        "snapshot_bytes": snapshot.stat().st_size if snapshot.exists() else 0,
+        "memory": memory,
+    }
+
+
+def list_entries(lang: str, prefix: str = "", after: str = None, limit: int = 100) -> dict:
+    """
+    Return up to `limit` entries whose key starts with `prefix`, in key order.
+    Pass the returned `next` value as `after` to fetch the following page.
+    """
+    start = prefix if after is None or after < prefix else after
+    entries = []
+    next_key = None
+
+    with _lock:
+        is_active = lang == _active_lang
+        store = _active_cache if is_active else _open_store(lang)
+        try:
+            for key, value in store.items(start):
+                if not key.startswith(prefix):
+                    break
+                if key == after:
+                    continue
+                if len(entries) == limit:
+                    next_key = entries[-1]["key"]
+                    break
+                entries.append({"key": key, "value": value})
+        finally:
+            if not is_active:
+                store.close()
+
+    return {"language": lang, "entries": entries, "next": next_key}
@@ -0,0 +1,427 @@
+"""
+Compact, read-optimised storage for one language cache.
+
+The bulk of the entries live in an immutable snapshot file: every key and value
+encoded as UTF-8, sorted by key, with offset tables for binary search. The
+snapshot is memory-mapped, so opening it is near-instant and entries stay on
+disk until they are read. Writes go to a small in-memory overlay (plus a set of
+tombstones for removals) that is folded into a fresh snapshot on save.
+
+Snapshot layout (native byte order, it is a local derived file):
+
+    magic        8 bytes  b"TCS2\\0\\0\\0\\0"
+    source_mtime uint64   mtime_ns of the JSON file it was built from
+    source_size  uint64   size of the JSON file it was built from
+    count        uint64   number of entries
+    failed       uint64   number of entries whose value is CANT_TRANSLATE
+    key offsets  uint64[count + 1]
+    value offsets uint64[count + 1]
+    key blob
+    value blob
+"""
+from array import array
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+
+MAGIC = b"TCS2\0\0\0\0"
+_HEADER = struct.Struct("=8sQQQQ")
+_OFFSET_SIZE = array("Q").itemsize
+
+# The value cached for strings that could not be translated; snapshots record
+# how many entries hold it so stats never have to scan for it
+CANT_TRANSLATE = "cant translate"
+
+
+class CompactStore:
+    """
+    Mapping-like str → str store backed by an optional mmap snapshot.
+    Supports the operations the cache needs: get, in, [key] = value, del, update,
+    len and sorted items().
+    """
+
+    def __init__(self, entries=None):
+        self._overlay = dict(entries or {})
+        self._removed = set()
+        self._snapshot_value_counts = {}
+
+        self._file = None
+        self._mm = None
+        self._key_offsets = None
+        self._value_offsets = None
+        self._keys_start = 0
+        self._values_start = 0
+        self._count = 0
+
+    # -----------------------------
+    # Snapshot I/O
+    # -----------------------------
+    @classmethod
+    def open(cls, path, source_stamp):
+        """
+        Memory-map the snapshot at `path`. Returns None when it is missing,
+        corrupt, or was built from a different version of the JSON file.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            return None
+
+        f = open(path, "rb")
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            return None
+
+        magic, mtime_ns, size, count, failed = _HEADER.unpack_from(mm, 0)
+        offsets_end = _HEADER.size + 2 * (count + 1) * _OFFSET_SIZE
+
+        if magic != MAGIC or (mtime_ns, size) != tuple(source_stamp) or len(mm) < offsets_end:
+            mm.close()
+            f.close()
+            return None
+
+        store = cls()
+        store._file = f
+        store._mm = mm
+        store._count = count
+        store._snapshot_value_counts[CANT_TRANSLATE] = failed
+
+        view = memoryview(mm)
+        key_offsets_end = _HEADER.size + (count + 1) * _OFFSET_SIZE
+        store._key_offsets = view[_HEADER.size:key_offsets_end].cast("Q")
+        store._value_offsets = view[key_offsets_end:offsets_end].cast("Q")
+        view.release()
+
+        store._keys_start = offsets_end
+        store._values_start = offsets_end + store._key_offsets[count]
+        return store
+
+    @staticmethod
+    def write(path, items, source_stamp):
+        """Write a snapshot from (key, value) pairs that are already sorted by key."""
+        writer = SnapshotWriter()
+        for key, value in items:
+            writer.add(key, value)
+        writer.finish(path, source_stamp)
+
+    def close(self):
+        """Release the memory map. The store must not be used afterwards."""
+        if self._mm is None:
+            return
+        self._key_offsets.release()
+        self._value_offsets.release()
+        self._mm.close()
+        self._file.close()
+        self._mm = None
+        self._file = None
+        self._count = 0
+
+    # -----------------------------
+    # Snapshot lookups
+    # -----------------------------
+    def _key_at(self, i: int) -> bytes:
+        start = self._keys_start + self._key_offsets[i]
+        end = self._keys_start + self._key_offsets[i + 1]
+        return self._mm[start:end]
+
+    def _value_at(self, i: int) -> str:
+        start = self._values_start + self._value_offsets[i]
+        end = self._values_start + self._value_offsets[i + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def _lower_bound(self, target: bytes) -> int:
+        """Index of the first snapshot key >= target."""
+        lo, hi = 0, self._count
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def _find(self, key: str) -> int:
+        """Binary search the snapshot; returns the entry index or -1."""
+        target = key.encode("utf-8")
+        i = self._lower_bound(target)
+        if i < self._count and self._key_at(i) == target:
+            return i
+        return -1
+
+    # -----------------------------
+    # Mapping API
+    # -----------------------------
+    def get(self, key: str, default=None):
+        if key in self._overlay:
+            return self._overlay[key]
+        if key in self._removed:
+            return default
+
+        i = self._find(key)
+        return self._value_at(i) if i >= 0 else default
+
+    def __contains__(self, key) -> bool:
+        if key in self._overlay:
+            return True
+        if key in self._removed:
+            return False
+        return self._find(key) >= 0
+
+    def __setitem__(self, key: str, value: str):
+        self._overlay[key] = value
+        self._removed.discard(key)
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+
+        self._overlay.pop(key, None)
+        if self._find(key) >= 0:
+            self._removed.add(key)
+
+    def update(self, entries):
+        for key, value in dict(entries).items():
+            self[key] = value
+
+    def __len__(self) -> int:
+        added = sum(1 for key in self._overlay if self._find(key) < 0)
+        return self._count - len(self._removed) + added
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    @property
+    def overlay_size(self) -> int:
+        """Number of pending writes and removals not yet folded into the snapshot."""
+        return len(self._overlay) + len(self._removed)
+
+    def memory_footprint(self) -> dict:
+        """
+        Approximate memory held by the store: the unsaved overlay lives on the
+        heap, the snapshot is mapped and only paged in as it is read.
+        """
+        overlay_bytes = sys.getsizeof(self._overlay) + sys.getsizeof(self._removed)
+        for key, value in self._overlay.items():
+            overlay_bytes += sys.getsizeof(key) + sys.getsizeof(value)
+        for key in self._removed:
+            overlay_bytes += sys.getsizeof(key)
+
+        return {
+            "overlay_entries": self.overlay_size,
+            "overlay_bytes": overlay_bytes,
+            "mapped_bytes": len(self._mm) if self._mm is not None else 0,
+        }
+
+    def pending_changes(self):
+        """Copy of the unsaved overlay and tombstones, for apply_changes on another store."""
+        return dict(self._overlay), set(self._removed)
+
+    def apply_changes(self, overlay: dict, removed):
+        for key in removed:
+            if key in self:
+                del self[key]
+        self.update(overlay)
+
+    def count_value(self, value: str) -> int:
+        """
+        Count the entries whose value equals `value`. The snapshot's count of
+        CANT_TRANSLATE comes from its header, so only the overlay is checked.
+        """
+        if value not in self._snapshot_value_counts:
+            target = value.encode("utf-8")
+            offsets = self._value_offsets
+            count = 0
+            for i in range(self._count):
+                # Compare lengths first so most values are never sliced out of the map
+                if offsets[i + 1] - offsets[i] == len(target) and self._value_at(i) == value:
+                    count += 1
+            self._snapshot_value_counts[value] = count
+
+        count = self._snapshot_value_counts[value]
+        for key in self._removed:
+            i = self._find(key)
+            if i >= 0 and self._value_at(i) == value:
+                count -= 1
+        for key, current in self._overlay.items():
+            i = self._find(key)
+            if i >= 0 and self._value_at(i) == value:
+                count -= 1
+            if current == value:
+                count += 1
+
+        return count
+
+    def items(self, start: str = ""):
+        """
+        Yield (key, value) pairs sorted by key, merging the overlay over the snapshot.
+        Iteration begins at the first key >= `start`.
+        """
+        overlay = sorted(item for item in self._overlay.items() if item[0] >= start)
+        j = 0
+
+        for i in range(self._lower_bound(start.encode("utf-8")), self._count):
+            key = self._key_at(i).decode("utf-8")
+
+            while j < len(overlay) and overlay[j][0] < key:
+                yield overlay[j]
+                j += 1
+
+            if j < len(overlay) and overlay[j][0] == key:
+                yield overlay[j]
+                j += 1
+            elif key not in self._removed:
+                yield key, self._value_at(i)
+
+        yield from overlay[j:]
+
+
+    def segments(self):
+        """
+        Describe the merged contents in key order without decoding untouched
+        entries: yields ("range", i, j) for runs of snapshot entries [i, j) that
+        the overlay does not change, and ("entry", key, value) for overlay entries.
+        """
+        changes = sorted(
+            [(key, True) for key in self._overlay] + [(key, False) for key in self._removed]
+        )
+        cursor = 0
+
+        for key, is_set in changes:
+            target = key.encode("utf-8")
+            i = self._lower_bound(target)
+
+            if i > cursor:
+                yield "range", cursor, i
+            if is_set:
+                yield "entry", key, self._overlay[key]
+
+            # Skip the snapshot entry this key replaces or removes
+            cursor = i + 1 if i < self._count and self._key_at(i) == target else max(cursor, i)
+
+        if cursor < self._count:
+            yield "range", cursor, self._count
+
+    def raw_range(self, i: int, j: int):
+        """The undecoded UTF-8 keys and values of snapshot entries [i, j), as two lists."""
+        return (
+            self._slice_blob(self._keys_start, self._key_offsets, i, j),
+            self._slice_blob(self._values_start, self._value_offsets, i, j),
+        )
+
+    def _slice_blob(self, start: int, offsets, i: int, j: int):
+        # One slice out of the map, then local offsets: much cheaper than _key_at per entry
+        offsets = offsets[i:j + 1].tolist()
+        base = offsets[0]
+        blob = self._mm[start + base:start + offsets[-1]]
+        return [blob[a - base:b - base] for a, b in zip(offsets, offsets[1:])]
+
+
+def _shifted(offsets, shift: int) -> array:
+    if shift == 0:
+        return array("Q", offsets.tobytes())
+    return array("Q", [offset + shift for offset in offsets.tolist()])
+
+
+class SnapshotWriter:
+    """
+    Build a snapshot one entry at a time with constant memory. Offsets and blobs
+    are spilled to temporary files as they are produced and only stitched
+    together behind the header in finish().
+    """
+
+    # Offsets buffered in memory before they are spilled
+    FLUSH_EVERY = 65536
+
+    def __init__(self):
+        self._key_offsets = tempfile.TemporaryFile()
+        self._value_offsets = tempfile.TemporaryFile()
+        self._keys = tempfile.TemporaryFile()
+        self._values = tempfile.TemporaryFile()
+
+        self._key_buffer = array("Q", [0])
+        self._value_buffer = array("Q", [0])
+        self._keys_size = 0
+        self._values_size = 0
+        self._count = 0
+        self._failed = 0
+
+    def _spill_offsets(self):
+        self._key_offsets.write(self._key_buffer.tobytes())
+        self._value_offsets.write(self._value_buffer.tobytes())
+        self._key_buffer = array("Q")
+        self._value_buffer = array("Q")
+
+    def add(self, key: str, value: str):
+        """Append an entry; keys must arrive in sorted order."""
+        key_bytes = key.encode("utf-8")
+        value_bytes = value.encode("utf-8")
+
+        self._keys.write(key_bytes)
+        self._values.write(value_bytes)
+        self._keys_size += len(key_bytes)
+        self._values_size += len(value_bytes)
+        self._count += 1
+        if value == CANT_TRANSLATE:
+            self._failed += 1
+
+        self._key_buffer.append(self._keys_size)
+        self._value_buffer.append(self._values_size)
+        if len(self._key_buffer) >= self.FLUSH_EVERY:
+            self._spill_offsets()
+
+    def add_range(self, store: CompactStore, i: int, j: int):
+        """
+        Copy snapshot entries [i, j) of `store` byte for byte, without decoding
+        them. Copied values are not inspected, so pass the total CANT_TRANSLATE
+        count to finish().
+        """
+        if i >= j:
+            return
+
+        key_offsets = store._key_offsets
+        value_offsets = store._value_offsets
+        key_start, key_end = key_offsets[i], key_offsets[j]
+        value_start, value_end = value_offsets[i], value_offsets[j]
+
+        self._keys.write(store._mm[store._keys_start + key_start:store._keys_start + key_end])
+        self._values.write(store._mm[store._values_start + value_start:store._values_start + value_end])
+
+        key_shift = self._keys_size - key_start
+        value_shift = self._values_size - value_start
+        self._key_buffer.extend(_shifted(key_offsets[i + 1:j + 1], key_shift))
+        self._value_buffer.extend(_shifted(value_offsets[i + 1:j + 1], value_shift))
+
+        self._keys_size += key_end - key_start
+        self._values_size += value_end - value_start
+        self._count += j - i
+
+        if len(self._key_buffer) >= self.FLUSH_EVERY:
+            self._spill_offsets()
+
+    def finish(self, path, source_stamp, failed: int = None):
+        """
+        Write the complete snapshot to `path` and discard the temporary files.
+        `failed` overrides the CANT_TRANSLATE count gathered by add().
+        """
+        self._spill_offsets()
+        mtime_ns, size = source_stamp
+        if failed is None:
+            failed = self._failed
+
+        parts = (self._key_offsets, self._value_offsets, self._keys, self._values)
+        try:
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, mtime_ns, size, self._count, failed))
+                for part in parts:
+                    part.seek(0)
+                    shutil.copyfileobj(part, f)
+        finally:
+            for part in parts:
+                part.close()
@@ -1,7 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 import json
 
-from cache import load_cache, find_differences, remove_differences_from_cache
+from cache import (
+    load_cache,
+    find_differences,
+    remove_differences_from_cache,
+    cached_languages,
+    language_stats,
+    list_entries,
+    import_entries,
+    iter_entries,
+    IMPORT_POLICIES,
+)
+from tm_formats import READERS, WRITERS, MIMETYPES
+from translate import collect_strings
+import prefetch
 
 bp = Blueprint("cache", __name__)
 
@@ -150,3 +163,287 @@ def cache_remove_keys():
 
     return jsonify({"removed": removed})
 
+
+
+@bp.route("/cache/prefetch", methods=["POST"])
+def cache_prefetch():
+    """Warm the cache ahead of a release by translating missing strings in the background.
+
+    Send either a source file (multipart) with a comma-separated `targets` field, or a
+    JSON body with `strings` and `languages`. Only strings missing from each language
+    cache are queued; the response returns immediately with how many were queued.
+
+    ---
+    tags:
+      - Cache
+    consumes:
+      - multipart/form-data
+      - application/json
+    parameters:
+      - in: formData
+        name: file
+        type: file
+        required: false
+        description: JSON or ARB source file. For .arb files '@' metadata keys are skipped.
+      - in: formData
+        name: targets
+        type: string
+        required: false
+        description: Comma-separated language codes, e.g. "es,fr,de"
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            strings:
+              type: array
+              items:
+                type: string
+            languages:
+              type: array
+              items:
+                type: string
+    responses:
+      202:
+        description: Number of strings queued per language
+    """
+    if "file" in request.files:
+        file = request.files["file"]
+        targets = request.form.get("targets", "")
+        languages = [t.strip() for t in targets.split(",") if t.strip()]
+
+        try:
+            data = json.load(file)
+        except Exception as ex:
+            return jsonify({"error": f"invalid JSON file: {ex}"}), 400
+
+        exclude_optional = (file.filename or "").lower().endswith(".arb")
+        strings = list(collect_strings(data, exclude_optional))
+    else:
+        payload = request.get_json(silent=True) or {}
+        strings = payload.get("strings")
+        languages = payload.get("languages")
+
+        if not strings or not isinstance(strings, list):
+            return jsonify({"error": "a file or a non-empty 'strings' list is required"}), 400
+
+    if not languages or not isinstance(languages, list):
+        return jsonify({"error": "at least one target language is required"}), 400
+
+    queued = prefetch.enqueue(strings, languages)
+
+    return jsonify({"status": "queued", "queued": queued}), 202
+
+
+@bp.route("/cache/prefetch", methods=["GET"])
+def cache_prefetch_status():
+    """Show how many strings are still waiting to be prefetched, per language.
+
+    ---
+    tags:
+      - Cache
+    responses:
+      200:
+        description: Pending prefetch counts
+    """
+    return jsonify({"pending": prefetch.pending_counts()})
+
+
+@bp.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Size and hit/miss statistics for every language cache.
+
+    ---
+    tags:
+      - Cache
+    responses:
+      200:
+        description: Per-language cache statistics
+    """
+    return jsonify({lang: language_stats(lang) for lang in cached_languages()})
+
+
+@bp.route("/cache/stats/<lang>", methods=["GET"])
+def cache_stats_language(lang):
+    """Size and hit/miss statistics for one language cache.
+
+    Counters (hits, misses, writes, removals) are kept in memory since the app started.
+
+    ---
+    tags:
+      - Cache
+    parameters:
+      - in: path
+        name: lang
+        type: string
+        required: true
+    responses:
+      200:
+        description: Cache statistics for the language
+      404:
+        description: No cache for this language
+    """
+    stats = language_stats(lang)
+
+    if not stats["json_bytes"] and not stats["active"] and not stats["entries"]:
+        return jsonify({"error": f"no cache for language '{lang}'"}), 404
+
+    return jsonify(stats)
+
+
+@bp.route("/cache/entries/<lang>", methods=["GET"])
+def cache_entries(lang):
+    """List cache entries for one language, in key order, optionally filtered by prefix.
+
+    Only the requested language is opened. Use the `next` value from the response as
+    `after` to fetch the following page.
+
+    ---
+    tags:
+      - Cache
+    parameters:
+      - in: path
+        name: lang
+        type: string
+        required: true
+      - in: query
+        name: prefix
+        type: string
+        required: false
+      - in: query
+        name: after
+        type: string
+        required: false
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+    responses:
+      200:
+        description: A page of cache entries
+    """
+    prefix = request.args.get("prefix", "")
+    after = request.args.get("after")
+
+    try:
+        limit = int(request.args.get("limit", 100))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    if limit < 1 or limit > 1000:
+        return jsonify({"error": "limit must be between 1 and 1000"}), 400
+
+    return jsonify(list_entries(lang, prefix, after, limit))
+
+
+@bp.route("/cache/export/<lang>", methods=["GET"])
+def cache_export(lang):
+    """Stream the saved cache for one language as JSONL, CSV or TMX.
+
+    ---
+    tags:
+      - Cache
+    parameters:
+      - in: path
+        name: lang
+        type: string
+        required: true
+      - in: query
+        name: format
+        type: string
+        enum: [jsonl, csv, tmx]
+        default: jsonl
+      - in: query
+        name: source_lang
+        type: string
+        default: en
+        description: Source language code written to TMX files
+    responses:
+      200:
+        description: Downloadable translation memory file
+      404:
+        description: No cache for this language
+    """
+    fmt = request.args.get("format", "jsonl").lower()
+    source_lang = request.args.get("source_lang", "en")
+
+    if fmt not in WRITERS:
+        return jsonify({"error": f"format must be one of {', '.join(WRITERS)}"}), 400
+
+    if lang not in cached_languages():
+        return jsonify({"error": f"no cache for language '{lang}'"}), 404
+
+    body = WRITERS[fmt](iter_entries(lang), lang, source_lang)
+
+    return Response(
+        body,
+        mimetype=MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={lang}.{fmt}"},
+    )
+
+
+@bp.route("/cache/import/<lang>", methods=["POST"])
+def cache_import(lang):
+    """Stream a JSONL, CSV or TMX translation memory into one language cache.
+
+    ---
+    tags:
+      - Cache
+    consumes:
+      - multipart/form-data
+    parameters:
+      - in: path
+        name: lang
+        type: string
+        required: true
+      - in: formData
+        name: file
+        type: file
+        required: true
+      - in: formData
+        name: format
+        type: string
+        enum: [jsonl, csv, tmx]
+        required: false
+        description: Defaults to the file extension
+      - in: formData
+        name: policy
+        type: string
+        enum: [keep, overwrite]
+        default: keep
+        description: |-
+          keep: existing translations win ("cant translate" entries are still replaced).
+          overwrite: imported translations win.
+      - in: formData
+        name: skip_failures
+        type: boolean
+        default: true
+        description: Drop imported entries whose value is "cant translate"
+    responses:
+      200:
+        description: Import summary
+    """
+    if "file" not in request.files:
+        return jsonify({"error": "file is required"}), 400
+
+    file = request.files["file"]
+    fmt = request.form.get("format") or (file.filename or "").rsplit(".", 1)[-1]
+    fmt = fmt.lower()
+    policy = request.form.get("policy", "keep")
+    skip_failures = str(request.form.get("skip_failures", "true")).lower() in ("1", "true", "yes")
+
+    if fmt not in READERS:
+        return jsonify({"error": f"format must be one of {', '.join(READERS)}"}), 400
+
+    if policy not in IMPORT_POLICIES:
+        return jsonify({"error": f"policy must be one of {', '.join(IMPORT_POLICIES)}"}), 400
+
+    try:
+        entries = READERS[fmt](file.stream, lang)
+        summary = import_entries(lang, entries, policy, skip_failures)
+    except Exception as ex:
+        return jsonify({"error": str(ex)}), 500
+
+    return jsonify({"language": lang, "format": fmt, "policy": policy, **summary})
@@ -2,12 +2,59 @@ from flask import Blueprint, request, jsonify, send_file
 from io import BytesIO
 import json
 
-from translate import translate_arb_structure, translate_json_structure, translate_word_xpath
+from translate import (
+    Deadline,
+    collect_strings,
+    prefill_cache,
+    translate_arb_structure,
+    translate_json_structure,
+    translate_word_xpath,
+)
 from cache import load_cache, save_cache
+from prefetch import foreground
+import prefetch
 
 bp = Blueprint("translate", __name__)
 
 
+def _parse_deadline():
+    """
+    Read the optional `deadline` (seconds) and `untranslated` form fields.
+    Returns (Deadline or None, error message or None).
+    """
+    raw = request.form.get("deadline")
+    if raw in (None, ""):
+        return None, None
+
+    try:
+        seconds = float(raw)
+    except ValueError:
+        return None, "deadline must be a number of seconds"
+
+    if seconds <= 0:
+        return None, "deadline must be greater than 0"
+
+    untranslated = request.form.get("untranslated", "source").lower()
+    if untranslated not in ("source", "null"):
+        return None, "untranslated must be 'source' or 'null'"
+
+    return Deadline(seconds, keep_source=untranslated == "source"), None
+
+
+def _finish_partial(response, deadline, target):
+    """Queue whatever the deadline cut off for background translation and report it."""
+    if deadline is None:
+        return response
+
+    remaining = len(dict.fromkeys(deadline.pending))
+    if remaining:
+        prefetch.enqueue(deadline.pending, [target])
+
+    response.headers["X-Translation-Partial"] = "true" if remaining else "false"
+    response.headers["X-Translation-Remaining"] = str(remaining)
+    return response
+
+
 @bp.route("/translate/xpath", methods=["POST"])
 def translate_xpath():
     """Translate a single word using xpath-friendly translation function.
@@ -41,7 +88,8 @@ def translate_xpath():
         return jsonify({"error": "word and lang are required"}), 400
 
     try:
-        translated = translate_word_xpath(word, lang)
+        with foreground():
+            translated = translate_word_xpath(word, lang)
         return jsonify({
             "original": word,
             "language": lang,
@@ -69,6 +117,21 @@ def translate_file_json():
         name: target
         type: string
         required: true
+      - in: formData
+        name: deadline
+        type: number
+        required: false
+        description: |-
+          Time budget in seconds. Once it runs out, strings that are not cached are left
+          untranslated and translated in the background instead; the response carries
+          X-Translation-Partial and X-Translation-Remaining headers.
+      - in: formData
+        name: untranslated
+        type: string
+        enum: [source, "null"]
+        required: false
+        default: source
+        description: What to put in leaves cut off by the deadline (source text or null).
     responses:
       200:
         description: Downloadable translated JSON file
@@ -82,13 +145,20 @@ def translate_file_json():
     if not target:
         return jsonify({"error": "target language code is required"}), 400
 
+    deadline, error = _parse_deadline()
+    if error:
+        return jsonify({"error": error}), 400
+
     try:
         load_cache(target)
         # Load JSON
         data = json.load(file)
 
         # Translate recursively
-        translated = translate_json_structure(data, target)
+        with foreground():
+            # Multi-tab mode (SELENIUM_TABS > 1) fetches every miss up front
+            prefill_cache(collect_strings(data), target, deadline=deadline)
+            translated = translate_json_structure(data, target, deadline)
 
         # Convert back to JSON
         output = json.dumps(translated, ensure_ascii=False, indent=4)
@@ -102,13 +172,15 @@ def translate_file_json():
 
         filename = f"{target}.json"
 
-        return send_file(
+        response = send_file(
             buffer,
             mimetype="application/json",
             as_attachment=True,
             download_name=filename
         )
 
+        return _finish_partial(response, deadline, target)
+
     except Exception as ex:
         return jsonify({"error": str(ex)}), 500
 
@@ -139,6 +211,21 @@ def translate_file_arb():
         description: |-
           When true (default), optional attributes (keys starting with '@') will be removed from the output.
           When false, optional attributes are kept and their values will be processed/translated.
+      - in: formData
+        name: deadline
+        type: number
+        required: false
+        description: |-
+          Time budget in seconds. Once it runs out, strings that are not cached are left
+          untranslated and translated in the background instead; the response carries
+          X-Translation-Partial and X-Translation-Remaining headers.
+      - in: formData
+        name: untranslated
+        type: string
+        enum: [source, "null"]
+        required: false
+        default: source
+        description: What to put in leaves cut off by the deadline (source text or null).
     responses:
       200:
         description: Downloadable translated ARB file
@@ -156,6 +243,10 @@ def translate_file_arb():
     if not target:
         return jsonify({"error": "target language code is required"}), 400
 
+    deadline, error = _parse_deadline()
+    if error:
+        return jsonify({"error": error}), 400
+
     try:
         # Load cache for this language
         load_cache(target)
@@ -164,7 +255,10 @@ def translate_file_arb():
         data = json.load(file)
 
         # Translate recursively, honoring exclude_optional
-        translated = translate_arb_structure(data, target, exclude_optional)
+        with foreground():
+            # Multi-tab mode (SELENIUM_TABS > 1) fetches every miss up front
+            prefill_cache(collect_strings(data, exclude_optional), target, deadline=deadline)
+            translated = translate_arb_structure(data, target, exclude_optional, deadline)
 
         # Convert back to ARB JSON
         output = json.dumps(translated, ensure_ascii=False, indent=4)
@@ -179,12 +273,14 @@ def translate_file_arb():
 
         filename = f"{target}.arb"
 
-        return send_file(
+        response = send_file(
             buffer,
             mimetype="application/json",
             as_attachment=True,
             download_name=filename
         )
 
+        return _finish_partial(response, deadline, target)
+
     except Exception as ex:
         return jsonify({"error": str(ex)}), 500
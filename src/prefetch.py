@@ -0,0 +1,141 @@
+"""
+Background cache warm-up.
+
+Strings queued here are translated one at a time on a single daemon thread and
+merged straight into the per-language cache files, so later /translate-file/*
+calls are pure cache hits. The worker runs at low priority: it waits while any
+foreground translation request is in progress, so it never competes with a
+live request for the (single) Selenium session.
+"""
+from contextlib import contextmanager
+import queue
+import threading
+
+from cache import missing_keys, update_language_cache
+from translate import fetch_translation, mask_handlebars
+
+
+# Number of translated entries buffered before they are written to disk
+BATCH_SIZE = 20
+
+_queue = queue.Queue()
+_pending = set()  # (lang, key) pairs queued or in flight
+_pending_lock = threading.Lock()
+
+_foreground = 0
+_foreground_cond = threading.Condition()
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+@contextmanager
+def foreground():
+    """Mark a live translation request; the prefetch worker pauses until it ends."""
+    global _foreground
+
+    with _foreground_cond:
+        _foreground += 1
+    try:
+        yield
+    finally:
+        with _foreground_cond:
+            _foreground -= 1
+            _foreground_cond.notify_all()
+
+
+def _wait_for_idle():
+    with _foreground_cond:
+        while _foreground:
+            _foreground_cond.wait()
+
+
+def enqueue(strings, languages) -> dict:
+    """
+    Queue every string that is missing from each language cache.
+    Strings are keyed the same way translate_preserving_handlebars keys them,
+    so handlebars are masked before the cache lookup.
+
+    Returns a {lang: number_of_strings_queued} summary.
+    """
+    keys = []
+    for text in strings:
+        if isinstance(text, str) and text.strip():
+            keys.append(mask_handlebars(text)[0])
+    keys = list(dict.fromkeys(keys))
+
+    queued = {}
+    for lang in languages:
+        count = 0
+        for key in missing_keys(lang, keys):
+            with _pending_lock:
+                if (lang, key) in _pending:
+                    continue
+                _pending.add((lang, key))
+            _queue.put((lang, key))
+            count += 1
+        queued[lang] = count
+
+    if any(queued.values()):
+        _ensure_worker()
+
+    return queued
+
+
+def pending_counts() -> dict:
+    """Return the number of strings still waiting to be prefetched, per language."""
+    counts = {}
+    with _pending_lock:
+        for lang, _ in _pending:
+            counts[lang] = counts.get(lang, 0) + 1
+    return counts
+
+
+def _ensure_worker():
+    global _worker
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="cache-prefetch", daemon=True)
+            _worker.start()
+
+
+def _flush(batch: dict):
+    for lang, entries in batch.items():
+        try:
+            update_language_cache(lang, entries)
+            print(f"[PREFETCH] saved {len(entries)} entries for lang:{lang}")
+        except Exception as ex:
+            print(f"[PREFETCH ERROR] could not save lang:{lang}: {ex}")
+
+        with _pending_lock:
+            for key in entries:
+                _pending.discard((lang, key))
+
+    batch.clear()
+
+
+def _run():
+    batch = {}
+    buffered = 0
+
+    while True:
+        lang, key = _queue.get()
+
+        try:
+            # Skip anything a foreground request translated in the meantime
+            if missing_keys(lang, [key]):
+                _wait_for_idle()
+                batch.setdefault(lang, {})[key] = fetch_translation(key, lang)
+                buffered += 1
+        except Exception as ex:
+            print(f"[PREFETCH ERROR] lang:{lang} word:{key}: {ex}")
+        finally:
+            # Keys in the batch stay pending until they are flushed; anything else is done
+            if key not in batch.get(lang, {}):
+                with _pending_lock:
+                    _pending.discard((lang, key))
+
+            if buffered >= BATCH_SIZE or _queue.empty():
+                _flush(batch)
+                buffered = 0
@@ -0,0 +1,200 @@
+"""
+Streaming readers and writers for exchanging translation memory in bulk.
+
+Readers take a binary file object and yield (source, translation) pairs one at a
+time; writers take an iterable of pairs and yield text chunks. Neither side
+holds more than one entry in memory, so millions of entries can be moved with
+constant memory. Malformed rows are yielded as (None, None) so the importer
+counts them as skipped instead of aborting. TMX cannot carry entries with
+control characters XML 1.0 forbids, so write_tmx leaves those out.
+
+Supported formats:
+    jsonl  one {"key": ..., "value": ...} object per line
+    csv    a "key,value" header followed by one row per entry
+    tmx    TMX 1.4 with one <tu> per entry
+"""
+import csv
+import io
+import json
+import re
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+# Characters XML 1.0 cannot represent at all, not even as character references
+INVALID_XML_CHARS = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+def _text_stream(stream):
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+# -----------------------------
+# JSONL
+# -----------------------------
+def read_jsonl(stream, lang: str = None):
+    for line in _text_stream(stream):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            entry = json.loads(line)
+            yield entry["key"], entry["value"]
+        except (ValueError, KeyError, TypeError):
+            yield None, None
+
+
+def write_jsonl(items, lang: str = None, source_lang: str = None):
+    for key, value in items:
+        yield json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+
+
+# -----------------------------
+# CSV
+# -----------------------------
+def read_csv(stream, lang: str = None):
+    reader = csv.reader(_text_stream(stream))
+    header = next(reader, None)
+
+    # The header row is optional
+    if header is not None and header[:2] != ["key", "value"]:
+        yield (header[0], header[1]) if len(header) >= 2 else (None, None)
+
+    for row in reader:
+        if not row:
+            continue
+        yield (row[0], row[1]) if len(row) >= 2 else (None, None)
+
+
+def write_csv(items, lang: str = None, source_lang: str = None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(["key", "value"])
+    for key, value in items:
+        writer.writerow([key, value])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+# -----------------------------
+# TMX
+# -----------------------------
+def _normalize(tag: str) -> str:
+    return (tag or "").lower().replace("_", "-")
+
+
+def _pick(variants, lang: str, exclude=None):
+    """
+    Index of the variant for `lang`: an exact tag match if there is one,
+    otherwise the first variant with the same base language (e.g. "es-ES" for "es").
+    """
+    lang = _normalize(lang)
+    candidates = [i for i in range(len(variants)) if i != exclude]
+
+    for i in candidates:
+        if variants[i][0] == lang:
+            return i
+    for i in candidates:
+        if variants[i][0].split("-")[0] == lang.split("-")[0]:
+            return i
+    return None
+
+
+def read_tmx(stream, lang: str):
+    """
+    Yield (source, translation) for every <tu> that has a variant in `lang`.
+    The source is the variant in the header's srclang, or the first other
+    variant when srclang is "*all*" or missing.
+    """
+    srclang = None
+    parents = []
+
+    for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+
+        parents.pop()
+
+        if element.tag == "header":
+            srclang = element.get("srclang")
+            continue
+
+        if element.tag != "tu":
+            continue
+
+        variants = []
+        for tuv in element.iter("tuv"):
+            seg = tuv.find("seg")
+            text = "".join(seg.itertext()) if seg is not None else ""
+            variants.append((_normalize(tuv.get(XML_LANG) or tuv.get("lang")), text))
+
+        # The source variant is never a candidate for the target, so an en-GB
+        # translation is found even when the source is en
+        source_i = None
+        if srclang and srclang != "*all*":
+            source_i = next((i for i, v in enumerate(variants) if v[0] == _normalize(srclang)), None)
+
+        target_i = _pick(variants, lang, exclude=source_i)
+        if target_i is not None and source_i is None:
+            source_i = next((i for i in range(len(variants)) if i != target_i), None)
+
+        if target_i is not None and source_i is not None and variants[source_i][1]:
+            yield variants[source_i][1], variants[target_i][1]
+
+        # Detach the parsed unit from its parent so memory stays flat
+        if parents:
+            parents[-1].remove(element)
+
+
+def _escape_seg(text: str) -> str:
+    # A literal \r would be normalised to \n by the parser on import
+    return escape(text, {"\r": "&#13;"})
+
+
+def write_tmx(items, lang: str, source_lang: str = "en"):
+    """
+    Entries containing characters XML 1.0 cannot represent (e.g. "\\x0b") are
+    left out so the file stays well-formed; the count is logged and noted in a
+    comment at the end of the file.
+    """
+    skipped = 0
+
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<tmx version="1.4">\n'
+    yield (
+        f'  <header creationtool="Auto-Translate-For-Developers" creationtoolversion="1" '
+        f'datatype="plaintext" segtype="sentence" adminlang="en" '
+        f'srclang={quoteattr(source_lang)} o-tmf="json"/>\n'
+    )
+    yield "  <body>\n"
+
+    for key, value in items:
+        if INVALID_XML_CHARS.search(key) or INVALID_XML_CHARS.search(value):
+            skipped += 1
+            continue
+
+        yield (
+            f"    <tu>\n"
+            f"      <tuv xml:lang={quoteattr(source_lang)}><seg>{_escape_seg(key)}</seg></tuv>\n"
+            f"      <tuv xml:lang={quoteattr(lang)}><seg>{_escape_seg(value)}</seg></tuv>\n"
+            f"    </tu>\n"
+        )
+
+    yield "  </body>\n"
+    if skipped:
+        print(f"[TMX] lang:{lang} skipped {skipped} entries with characters XML cannot represent")
+        yield f"  <!-- {skipped} entries skipped: they contain characters XML 1.0 cannot represent -->\n"
+    yield "</tmx>\n"
+
+
+READERS = {"jsonl": read_jsonl, "csv": read_csv, "tmx": read_tmx}
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv, "tmx": write_tmx}
+MIMETYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv", "tmx": "application/x-tmx+xml"}
@@ -8,12 +8,58 @@ import os
 import re
 import time
 
-from cache import get_cached, set_cached
+from cache import get_cached, set_cached, missing_keys
 
 
 SELENIUM_URL =  os.getenv("SELENIUM_URL", "http://localhost:4444/wd/hub")  
+# Number of tabs one browser session translates in parallel (1 = one page at a time)
+SELENIUM_TABS = int(os.getenv("SELENIUM_TABS", "1"))
 HANDLEBAR_REGEX = re.compile(r"{{.*?}}")
 
+TRANSLATE_HOME = "https://translate.google.com/"
+
+# Result selectors (your original + fallbacks)
+SELECTORS = [
+    (By.XPATH, "/html/body/c-wiz/div/div[2]/c-wiz/div[2]/c-wiz/div[1]/div[2]/div[2]/c-wiz/div[1]/div[6]/div/div[1]/span[1]/span/span"),
+    (By.CSS_SELECTOR, "span.ryNqvb"),
+    (By.XPATH, "//span[contains(@class,'ryNqvb')]"),
+]
+
+# Tabs are opened from a translate.google.com page with window.open, so they are
+# same-origin with it and one script can read every tab's document.
+OPEN_TABS_SCRIPT = """
+window.__translateTabs = arguments[0].map(function (url) {
+    return window.open(url, "_blank");
+});
+"""
+
+HARVEST_TABS_SCRIPT = """
+var selectors = arguments[0];
+return (window.__translateTabs || []).map(function (tab) {
+    try {
+        var doc = tab.document;
+        for (var i = 0; i < selectors.length; i++) {
+            var by = selectors[i][0], selector = selectors[i][1], el;
+            if (by === "xpath") {
+                el = doc.evaluate(selector, doc, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            } else {
+                el = doc.querySelector(selector);
+            }
+            var text = el ? (el.innerText || el.textContent || "").trim() : "";
+            if (text) {
+                return text;
+            }
+        }
+    } catch (e) {}
+    return "";
+});
+"""
+
+CLOSE_TABS_SCRIPT = """
+(window.__translateTabs || []).forEach(function (tab) { tab.close(); });
+window.__translateTabs = [];
+"""
+
 
 # Stable, reusable driver factory
 def create_driver():
@@ -29,51 +75,60 @@ def create_driver():
 
 
 
+class Deadline:
+    """
+    Time budget for one file translation. Once it expires, strings that are not
+    already cached are left untranslated and collected in `pending`.
+    """
 
-def translate_word_xpath(word: str, lang: str, attempts: int = 3) -> str:
-    # -----------------------------
-    # 1. Check cache first
-    # -----------------------------
-    cached = get_cached(word)
-    if cached:
-        print(f"[CACHE HIT] lang:{lang} word:{word} -> {cached}")
-        return cached
+    def __init__(self, seconds: float, keep_source: bool = True):
+        self.expires_at = time.monotonic() + seconds
+        self.keep_source = keep_source
+        self.pending = []
 
-    # -----------------------------
-    # 2. Build translation URL
-    # -----------------------------
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+def translate_url(word: str, lang: str) -> str:
     encoded = urllib.parse.quote(word)
-    url = f"https://translate.google.com/?sl=auto&tl={lang}&text={encoded}&op=translate"
+    return f"https://translate.google.com/?sl=auto&tl={lang}&text={encoded}&op=translate"
 
+
+def fetch_translation(word: str, lang: str, attempts: int = 3, deadline: Deadline = None):
+    """
+    Scrape a translation for `word` without touching the cache.
+    Returns "cant translate" when every attempt fails, or None when `deadline`
+    expired before all attempts could be made.
+    """
     # -----------------------------
-    # 3. Selectors (your original + fallbacks)
+    # 1. Build translation URL
     # -----------------------------
-    selectors = [
-        (By.XPATH, "/html/body/c-wiz/div/div[2]/c-wiz/div[2]/c-wiz/div[1]/div[2]/div[2]/c-wiz/div[1]/div[6]/div/div[1]/span[1]/span/span"),
-        (By.CSS_SELECTOR, "span.ryNqvb"),
-        (By.XPATH, "//span[contains(@class,'ryNqvb')]"),
-    ]
+    url = translate_url(word, lang)
 
     # -----------------------------
-    # 4. Retry loop
+    # 2. Retry loop
     # -----------------------------
     for attempt in range(1, attempts + 1):
-        driver = create_driver()
+        if deadline is not None and deadline.expired():
+            print(f"[DEADLINE] lang:{lang} word:{word} cut off after {attempt - 1} attempts")
+            return None
+
+        driver = None
         try:
+            # A session that cannot be created counts as a failed attempt
+            driver = create_driver()
             driver.get(url)
             time.sleep(2)  # allow Google Translate to render
 
             # Try each selector
-            for by, selector in selectors:
+            for by, selector in SELECTORS:
                 try:
                     element = driver.find_element(by, selector)
                     translated_text = element.text.strip()
 
                     if translated_text:
                         print(f"[OK] lang:{lang} word:{word} translated:{translated_text}")
-
-                        # Save to cache
-                        set_cached(word, translated_text)
                         return translated_text
 
                 except Exception:
@@ -87,30 +142,141 @@ def translate_word_xpath(word: str, lang: str, attempts: int = 3) -> str:
             time.sleep(1)
 
         finally:
-            driver.quit()
+            if driver is not None:
+                driver.quit()
 
     # -----------------------------
-    # 5. All attempts failed → cache failure
+    # 3. All attempts failed
     # -----------------------------
     print(f"[FAIL] Could not translate '{word}' after {attempts} attempts")
-    set_cached(word, "cant translate")
     return "cant translate"
 
 
+def fetch_translations(words, lang: str, tabs: int = SELENIUM_TABS, attempts: int = 3,
+                       deadline: Deadline = None) -> dict:
+    """
+    Scrape translations for many words in one browser session, `tabs` pages at a
+    time, without touching the cache. Every tab's result is read back with a
+    single execute_script call. Words that fail every attempt map to "cant translate".
+    Once `deadline` expires no new chunk is started and unfinished words are left out.
+    """
+    results = {}
+    remaining = list(dict.fromkeys(words))
+    tabs = max(1, tabs)
+
+    for attempt in range(1, attempts + 1):
+        if not remaining or (deadline is not None and deadline.expired()):
+            break
+
+        driver = None
+        try:
+            driver = create_driver()
+            driver.get(TRANSLATE_HOME)
+
+            for i in range(0, len(remaining), tabs):
+                if deadline is not None and deadline.expired():
+                    break
+
+                chunk = remaining[i:i + tabs]
+
+                driver.execute_script(OPEN_TABS_SCRIPT, [translate_url(w, lang) for w in chunk])
+                time.sleep(2)  # allow Google Translate to render in every tab
+
+                texts = driver.execute_script(HARVEST_TABS_SCRIPT, SELECTORS) or []
+                driver.execute_script(CLOSE_TABS_SCRIPT)
+
+                for word, text in zip(chunk, texts):
+                    if text:
+                        print(f"[OK] lang:{lang} word:{word} translated:{text}")
+                        results[word] = text
+
+        except Exception as ex:
+            print(f"[ERROR] Attempt {attempt}/{attempts} crashed: {ex}")
+
+        finally:
+            if driver is not None:
+                driver.quit()
+
+        remaining = [w for w in remaining if w not in results]
+        if remaining:
+            print(f"[WARN] Attempt {attempt}/{attempts} left {len(remaining)} words untranslated")
+            time.sleep(1)
+
+    # Out of time: the caller decides what to do with the rest
+    if deadline is not None and deadline.expired():
+        return results
+
+    for word in remaining:
+        print(f"[FAIL] Could not translate '{word}' after {attempts} attempts")
+        results[word] = "cant translate"
 
-def translate_preserving_handlebars(text: str, lang: str) -> str:
-    handlebars = HANDLEBAR_REGEX.findall(text)
+    return results
 
+
+def translate_word_xpath(word: str, lang: str, attempts: int = 3, deadline: Deadline = None):
+    # Check cache first
+    cached = get_cached(word)
+    if cached:
+        print(f"[CACHE HIT] lang:{lang} word:{word} -> {cached}")
+        return cached
+
+    # Scrape and cache the result (failures are cached too)
+    translated = fetch_translation(word, lang, attempts, deadline=deadline)
+
+    # Cut off by the deadline: not a failure, so nothing is cached
+    if translated is None:
+        return None
+
+    set_cached(word, translated)
+    return translated
+
+
+def prefill_cache(strings, lang: str, tabs: int = SELENIUM_TABS, deadline: Deadline = None):
+    """
+    Translate every string missing from the active cache in one multi-tab browser
+    session, so the per-string walk that follows is all cache hits.
+    Does nothing when multi-tab mode is off (tabs <= 1).
+    """
+    if tabs <= 1:
+        return
+
+    # missing_keys does not touch the hit/miss counters; the walk that follows does
+    keys = list(dict.fromkeys(mask_handlebars(text)[0] for text in strings))
+    missing = missing_keys(lang, keys)
+    if not missing:
+        return
+
+    for key, value in fetch_translations(missing, lang, tabs, deadline=deadline).items():
+        set_cached(key, value)
+
+
+def mask_handlebars(text: str):
+    """
+    Replace every {{...}} in `text` with a __HB<n>__ placeholder.
+    Returns the masked text (the cache key) and the placeholder → handlebar map.
+    """
     placeholder_map = {}
     temp_text = text
 
-    for i, hb in enumerate(handlebars):
+    for i, hb in enumerate(HANDLEBAR_REGEX.findall(text)):
         placeholder = f"__HB{i}__"
         placeholder_map[placeholder] = hb
         temp_text = temp_text.replace(hb, placeholder)
 
-    translated = translate_word_xpath(temp_text, lang)
+    return temp_text, placeholder_map
 
+
+def translate_preserving_handlebars(text: str, lang: str, deadline: Deadline = None):
+    temp_text, placeholder_map = mask_handlebars(text)
+
+    translated = translate_word_xpath(temp_text, lang, deadline=deadline)
+    if translated is None:
+        return None
+
+    return unmask_handlebars(translated, placeholder_map)
+
+
+def unmask_handlebars(translated: str, placeholder_map: dict) -> str:
     # If translation failed, return "cant translate" as-is
     if translated == "cant translate":
         return translated
@@ -121,24 +287,46 @@ def translate_preserving_handlebars(text: str, lang: str) -> str:
     return translated
 
 
+def _translate_leaf(text: str, lang: str, deadline: Deadline = None):
+    """
+    Translate one string, or only serve it from cache once `deadline` has expired.
+    A string whose retries are cut off by the deadline is collected like a miss.
+    """
+    if deadline is None:
+        return translate_preserving_handlebars(text, lang)
+
+    if not deadline.expired():
+        translated = translate_preserving_handlebars(text, lang, deadline=deadline)
+        if translated is not None:
+            return translated
+    else:
+        key, placeholder_map = mask_handlebars(text)
+        cached = get_cached(key)
+        if cached:
+            return unmask_handlebars(cached, placeholder_map)
+
+    deadline.pending.append(text)
+    return text if deadline.keep_source else None
 
-def translate_json_structure(data, lang: str):
+
+def translate_json_structure(data, lang: str, deadline: Deadline = None):
     """
     Recursively translate all string values in a nested JSON structure.
+    With a `deadline`, strings reached after it expires are only served from cache.
     """
     if isinstance(data, dict):
-        return {k: translate_json_structure(v, lang) for k, v in data.items()}
+        return {k: translate_json_structure(v, lang, deadline) for k, v in data.items()}
 
     if isinstance(data, list):
-        return [translate_json_structure(v, lang) for v in data]
+        return [translate_json_structure(v, lang, deadline) for v in data]
 
     if isinstance(data, str):
-        return translate_preserving_handlebars(data, lang)
+        return _translate_leaf(data, lang, deadline)
 
     return data
 
 
-def translate_arb_structure(data, lang: str, exclude_optional: bool = True):
+def translate_arb_structure(data, lang: str, exclude_optional: bool = True, deadline: Deadline = None):
     """
     Recursively translate all string values in an ARB file structure.
     ARB files are JSON-like, but may contain metadata keys starting with '@'.
@@ -149,6 +337,8 @@ def translate_arb_structure(data, lang: str, exclude_optional: bool = True):
         lang: Target language code.
         exclude_optional: If True, keys starting with '@' will be left untouched. If False,
             values under '@' keys will be processed/translated like regular entries.
+        deadline: Optional time budget; strings reached after it expires are only
+            served from cache and otherwise collected in deadline.pending.
     """
     if isinstance(data, dict):
         translated_dict = {}
@@ -158,16 +348,35 @@ def translate_arb_structure(data, lang: str, exclude_optional: bool = True):
                     # When exclude_optional is True we omit metadata keys entirely from the result
                     continue
                 # When exclude_optional is False we process/translate the metadata value normally
-                translated_dict[k] = translate_arb_structure(v, lang, exclude_optional)
+                translated_dict[k] = translate_arb_structure(v, lang, exclude_optional, deadline)
             else:
-                translated_dict[k] = translate_arb_structure(v, lang, exclude_optional)
+                translated_dict[k] = translate_arb_structure(v, lang, exclude_optional, deadline)
         return translated_dict
 
     if isinstance(data, list):
-        return [translate_arb_structure(v, lang, exclude_optional) for v in data]
+        return [translate_arb_structure(v, lang, exclude_optional, deadline) for v in data]
 
     if isinstance(data, str):
         # Preserve placeholders like {variable} in ARB
-        return translate_preserving_handlebars(data, lang)
+        return _translate_leaf(data, lang, deadline)
 
     return data
+
+
+def collect_strings(data, exclude_optional: bool = False):
+    """
+    Yield every string leaf of a parsed JSON/ARB structure.
+    With exclude_optional=True, values under '@' keys are skipped (ARB metadata).
+    """
+    if isinstance(data, dict):
+        for k, v in data.items():
+            if exclude_optional and k.startswith("@"):
+                continue
+            yield from collect_strings(v, exclude_optional)
+
+    elif isinstance(data, list):
+        for v in data:
+            yield from collect_strings(v, exclude_optional)
+
+    elif isinstance(data, str):
+        yield data
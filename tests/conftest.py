@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+# The app imports its modules top-level (`from cache import ...`) while the tests
+# use `from src import cache`. Put src on the path and alias both names to the same
+# module objects so monkeypatching in tests affects the code under test.
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import cache  # noqa: E402
+import translate  # noqa: E402
+import prefetch  # noqa: E402
+
+for _module in (cache, translate, prefetch):
+    sys.modules.setdefault(f"src.{_module.__name__}", _module)
@@ -0,0 +1,174 @@
+import json
+from io import BytesIO
+from pathlib import Path
+from src import cache
+from src.main import app
+
+
+def setup_test_cache(monkeypatch, tmp_path: Path):
+    test_cache_dir = tmp_path / "translation_cache"
+    test_cache_dir.mkdir()
+
+    es = {"Hello": "Hola", "Bye": "cant translate", "Tag <b>": "Etiqueta <b> & más"}
+    (test_cache_dir / "es.json").write_text(json.dumps(es, ensure_ascii=False))
+
+    monkeypatch.setattr(cache, "CACHE_DIR", test_cache_dir)
+    monkeypatch.setattr(cache, "_active_lang", None)
+    monkeypatch.setattr(cache, "_active_cache", cache.CompactStore())
+    return test_cache_dir
+
+
+def import_file(client, lang, content, filename, **form):
+    data = {"file": (BytesIO(content.encode("utf-8")), filename), **form}
+    return client.post(f"/cache/import/{lang}", data=data, content_type="multipart/form-data")
+
+
+def test_export_import_round_trip(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(monkeypatch, tmp_path)
+    client = app.test_client()
+    cache.update_language_cache("es", {"Two\r\nlines": "Dos\r\nlíneas", "Vertical\x0btab": "Tab\x0bvertical"})
+    original = json.loads((test_dir / "es.json").read_text())
+
+    for fmt in ("jsonl", "csv", "tmx"):
+        resp = client.get(f"/cache/export/es?format={fmt}")
+        assert resp.status_code == 200
+        exported = resp.get_data(as_text=True)
+
+        # XML 1.0 cannot represent \x0b, so TMX leaves that entry out and stays well-formed
+        expected = dict(original)
+        if fmt == "tmx":
+            del expected["Vertical\x0btab"]
+            assert "1 entries skipped" in exported
+
+        cache.clear_language_cache("es")
+
+        resp = import_file(client, "es", exported, f"es.{fmt}", skip_failures="false")
+        assert resp.status_code == 200
+        assert resp.get_json()["imported"] == len(expected)
+
+        assert json.loads((test_dir / "es.json").read_text()) == expected
+        # Restore the entry TMX could not carry before the next format
+        cache.update_language_cache("es", original)
+
+
+def test_import_merge_policies(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(monkeypatch, tmp_path)
+    client = app.test_client()
+
+    lines = "\n".join(json.dumps({"key": k, "value": v}) for k, v in [
+        ("Hello", "Hola!"),
+        ("Bye", "Adiós"),
+        ("New", "cant translate"),
+    ])
+
+    # keep: existing translations win, but "cant translate" is replaced; failures skipped
+    summary = import_file(client, "es", lines, "tm.jsonl").get_json()
+    assert (summary["imported"], summary["kept"], summary["skipped"]) == (1, 1, 1)
+
+    es = json.loads((test_dir / "es.json").read_text())
+    assert es["Hello"] == "Hola"
+    assert es["Bye"] == "Adiós"
+    assert "New" not in es
+
+    # overwrite: imported translations win
+    import_file(client, "es", lines, "tm.jsonl", policy="overwrite")
+    assert json.loads((test_dir / "es.json").read_text())["Hello"] == "Hola!"
+
+
+def test_import_spills_runs_and_rewrites_once(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(monkeypatch, tmp_path)
+    monkeypatch.setattr(cache, "IMPORT_BATCH_SIZE", 2)
+
+    runs = []
+    installs = []
+    original_write_run = cache._write_run
+    original_install = cache._install_files
+    monkeypatch.setattr(cache, "_write_run", lambda *args: runs.append(len(args[2])) or original_write_run(*args))
+    monkeypatch.setattr(cache, "_install_files", lambda *args: installs.append(args[0]) or original_install(*args))
+
+    # "k1" repeats in a later run: the last occurrence wins
+    entries = [(f"k{i}", f"v{i}") for i in range(5)] + [("k1", "v1-again"), ("Bye", "Adiós")]
+    summary = cache.import_entries("es", iter(entries))
+
+    assert runs == [2, 2, 2, 1]
+    assert installs == ["es"]
+    assert (summary["read"], summary["imported"], summary["kept"]) == (7, 6, 0)
+
+    es = json.loads((test_dir / "es.json").read_text())
+    assert es["k1"] == "v1-again"
+    assert es["Bye"] == "Adiós"
+    assert es["Hello"] == "Hola"
+    assert list(es) == sorted(es)
+    assert not [p for p in test_dir.iterdir() if p.name.startswith(".")]
+
+
+def test_import_keeps_unsaved_changes_of_the_active_cache(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(monkeypatch, tmp_path)
+
+    cache.load_cache("es")
+    cache.set_cached("Unsaved", "Sin guardar")
+
+    cache.import_entries("es", iter([("Imported", "Importado")]))
+
+    assert cache.get_cached("Unsaved") == "Sin guardar"
+    assert cache.get_cached("Imported") == "Importado"
+    assert json.loads((test_dir / "es.json").read_text())["Unsaved"] == "Sin guardar"
+
+
+def test_import_retries_when_cache_changes_during_merge(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(monkeypatch, tmp_path)
+
+    original = cache._write_temp_files
+    calls = []
+
+    def write_with_concurrent_update(lang, items):
+        calls.append(lang)
+        if len(calls) == 1:
+            # Another writer (e.g. the prefetch worker) saves while the merge runs
+            cache.update_language_cache("es", {"Concurrent": "Concurrente"})
+        return original(lang, items)
+
+    monkeypatch.setattr(cache, "_write_temp_files", write_with_concurrent_update)
+
+    summary = cache.import_entries("es", iter([("Imported", "Importado")]))
+
+    es = json.loads((test_dir / "es.json").read_text())
+    assert es["Concurrent"] == "Concurrente"
+    assert es["Imported"] == "Importado"
+    assert summary["imported"] == 1
+    assert calls.count("es") == 2  # discarded merge, retried merge
+
+
+def test_tmx_matches_exact_tags_before_base_language():
+    from src.tm_formats import read_tmx, write_tmx
+
+    # Source and target share a base language
+    tmx = "".join(write_tmx([("Colour", "Colour (GB)")], "en-GB", "en")).encode("utf-8")
+    assert list(read_tmx(BytesIO(tmx), "en-GB")) == [("Colour", "Colour (GB)")]
+
+    # A regional variant still matches the base language when nothing matches exactly
+    tmx = "".join(write_tmx([("Hello", "Hola")], "es-ES", "en")).encode("utf-8")
+    assert list(read_tmx(BytesIO(tmx), "es")) == [("Hello", "Hola")]
+
+    # srclang picks the source even when it is not the first variant
+    tmx = b"""<tmx version="1.4"><header srclang="en"/><body>
+      <tu><tuv xml:lang="fr"><seg>Bonjour</seg></tuv><tuv xml:lang="de"><seg>Hallo</seg></tuv>
+          <tuv xml:lang="en"><seg>Hello</seg></tuv></tu>
+    </body></tmx>"""
+    assert list(read_tmx(BytesIO(tmx), "de")) == [("Hello", "Hallo")]
+
+
+def test_malformed_rows_are_skipped(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(monkeypatch, tmp_path)
+    client = app.test_client()
+
+    csv_body = "lonely\nA,Ä\nB\n\nC,Ç\n"
+    summary = import_file(client, "de", csv_body, "tm.csv").get_json()
+    assert (summary["read"], summary["imported"], summary["skipped"]) == (4, 2, 2)
+
+    jsonl_body = '{"key": "D", "value": "Đ"}\nnot json\n{"key": "E"}\n[1, 2]\n'
+    summary = import_file(client, "de", jsonl_body, "tm.jsonl").get_json()
+    assert (summary["read"], summary["imported"], summary["skipped"]) == (4, 1, 3)
+
+    de = json.loads((test_dir / "de.json").read_text())
+    assert de == {"A": "Ä", "C": "Ç", "D": "Đ"}
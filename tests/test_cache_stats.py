@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+from src import cache
+from src.main import app
+
+
+def setup_test_cache(monkeypatch, tmp_path: Path):
+    test_cache_dir = tmp_path / "translation_cache"
+    test_cache_dir.mkdir()
+
+    es = {"Apple": "Manzana", "App": "Aplicación", "Banana": "cant translate", "Bye": "Adiós"}
+    (test_cache_dir / "es.json").write_text(json.dumps(es, ensure_ascii=False))
+    (test_cache_dir / "fr.json").write_text(json.dumps({"Hello": "Bonjour"}))
+
+    monkeypatch.setattr(cache, "CACHE_DIR", test_cache_dir)
+    monkeypatch.setattr(cache, "_active_lang", None)
+    monkeypatch.setattr(cache, "_active_cache", cache.CompactStore())
+    monkeypatch.setattr(cache, "_counters", cache.defaultdict(cache.Counter))
+    return test_cache_dir
+
+
+def test_stats_track_hits_and_failures(monkeypatch, tmp_path):
+    setup_test_cache(monkeypatch, tmp_path)
+
+    cache.load_cache("es")
+    cache.get_cached("Apple")
+    cache.get_cached("Missing")
+    cache.set_cached("Missing", "cant translate")
+
+    stats = cache.language_stats("es")
+    assert stats["entries"] == 5
+    assert stats["cant_translate"] == 2
+    assert stats["unsaved_changes"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert stats["memory"]["overlay_entries"] == 1
+    assert stats["memory"]["overlay_bytes"] > 0
+    assert stats["memory"]["mapped_bytes"] == stats["snapshot_bytes"]
+
+    client = app.test_client()
+    resp = client.get("/cache/stats")
+    assert resp.status_code == 200
+    assert set(resp.get_json()) == {"es", "fr"}
+    assert resp.get_json()["fr"]["entries"] == 1
+
+    assert client.get("/cache/stats/de").status_code == 404
+
+
+def test_entries_are_paginated_by_prefix(monkeypatch, tmp_path):
+    setup_test_cache(monkeypatch, tmp_path)
+    client = app.test_client()
+
+    resp = client.get("/cache/entries/es?prefix=App&limit=1")
+    page = resp.get_json()
+    assert page["entries"] == [{"key": "App", "value": "Aplicación"}]
+    assert page["next"] == "App"
+
+    page = client.get(f"/cache/entries/es?prefix=App&limit=1&after={page['next']}").get_json()
+    assert page["entries"] == [{"key": "Apple", "value": "Manzana"}]
+    assert page["next"] is None
+
+    page = client.get("/cache/entries/es?prefix=B").get_json()
+    assert [e["key"] for e in page["entries"]] == ["Banana", "Bye"]
+
+
+def test_prefill_does_not_skew_hit_ratio(monkeypatch, tmp_path):
+    from src import translate
+
+    setup_test_cache(monkeypatch, tmp_path)
+    monkeypatch.setattr(translate, "fetch_translations", lambda words, lang, tabs, deadline=None: {w: w + "_X" for w in words})
+    monkeypatch.setattr(translate, "fetch_translation", lambda word, lang, attempts=3: word + "_X")
+
+    cache.load_cache("es")
+    data = {"a": "Apple", "b": "New"}
+    translate.prefill_cache(translate.collect_strings(data), "es", tabs=4)
+    translate.translate_json_structure(data, "es")
+
+    stats = cache.language_stats("es")
+    # One counted lookup per string: prefill's miss check is not counted
+    assert stats["hits"] + stats["misses"] == 2
@@ -0,0 +1,120 @@
+import json
+from pathlib import Path
+from src import cache
+from src.compact_store import CompactStore
+
+
+def test_snapshot_lookup_and_overlay(tmp_path: Path):
+    entries = {"Hello": "Hola", "Bye": "Adiós", "Ünïcode": "ok", "a": "b"}
+    stamp = (1, 2)
+    path = tmp_path / "es.snapshot"
+
+    CompactStore.write(path, sorted(entries.items()), stamp)
+    store = CompactStore.open(path, stamp)
+
+    assert store.get("Hello") == "Hola"
+    assert store.get("Bye") == "Adiós"
+    assert store.get("Ünïcode") == "ok"
+    assert store.get("missing") is None
+    assert len(store) == 4
+
+    store["New"] = "Nuevo"
+    store["Hello"] = "Hola!"
+    del store["Bye"]
+
+    assert store.get("Hello") == "Hola!"
+    assert "Bye" not in store
+    assert len(store) == 4
+    assert list(store.items()) == [
+        ("Hello", "Hola!"),
+        ("New", "Nuevo"),
+        ("a", "b"),
+        ("Ünïcode", "ok"),
+    ]
+
+    store.close()
+
+    # A snapshot built from a different JSON version is rejected
+    assert CompactStore.open(path, (1, 3)) is None
+
+
+def test_cache_round_trip_and_stale_snapshot(monkeypatch, tmp_path: Path):
+    test_dir = tmp_path / "translation_cache"
+    test_dir.mkdir()
+    monkeypatch.setattr(cache, "CACHE_DIR", test_dir)
+
+    (test_dir / "es.json").write_text(json.dumps({"Hello": "Hola"}))
+
+    cache.load_cache("es")
+    assert cache.get_cached("Hello") == "Hola"
+    assert (test_dir / "es.snapshot").exists()
+
+    cache.set_cached("Bye", "Adiós")
+    cache.save_cache()
+
+    assert json.loads((test_dir / "es.json").read_text()) == {"Bye": "Adiós", "Hello": "Hola"}
+
+    # Editing the JSON by hand invalidates the snapshot
+    (test_dir / "es.json").write_text(json.dumps({"Hello": "Hola", "Other": "Otro", "x": "y"}))
+
+    cache.load_cache("es")
+    assert cache.get_cached("Other") == "Otro"
+    assert cache.get_cached("Bye") is None
+
+
+def test_save_copies_untouched_ranges_and_skips_noop_saves(monkeypatch, tmp_path: Path):
+    test_dir = tmp_path / "translation_cache"
+    test_dir.mkdir()
+    monkeypatch.setattr(cache, "CACHE_DIR", test_dir)
+    monkeypatch.setattr(cache._CacheFileWriter, "JSON_CHUNK", 2)
+
+    entries = {f"key {i:02}": f"valor {i} ñ" for i in range(10)}
+    # Ranges with characters JSON escapes take the slower encoding path
+    entries.update({"quote \"q\"": "línea\nnueva", "slash \\": "tab\t"})
+    (test_dir / "es.json").write_text(json.dumps(entries))
+    cache.load_cache("es")
+
+    # Nothing changed, so the files are left alone
+    before = (test_dir / "es.json").stat().st_mtime_ns
+    cache.save_cache()
+    assert (test_dir / "es.json").stat().st_mtime_ns == before
+
+    cache.set_cached("key 03", "cambiado")
+    cache.set_cached("key 99", "nuevo")
+    cache.set_cached("a first", "primero")
+    cache.remove_cached("key 07")
+    cache.save_cache()
+
+    expected = dict(entries, **{"key 03": "cambiado", "key 99": "nuevo", "a first": "primero"})
+    del expected["key 07"]
+    text = (test_dir / "es.json").read_text()
+    assert text == json.dumps(dict(sorted(expected.items())), ensure_ascii=False, indent=2)
+
+    # The rewritten snapshot is valid and matches the JSON
+    cache.load_cache("es")
+    assert cache._active_cache.overlay_size == 0
+    assert dict(cache._active_cache.items()) == expected
+
+
+def test_failure_count_is_kept_in_the_snapshot_header(monkeypatch, tmp_path: Path):
+    test_dir = tmp_path / "translation_cache"
+    test_dir.mkdir()
+    monkeypatch.setattr(cache, "CACHE_DIR", test_dir)
+
+    entries = {f"key {i}": "cant translate" if i % 3 == 0 else f"valor {i}" for i in range(9)}
+    (test_dir / "es.json").write_text(json.dumps(entries))
+    cache.load_cache("es")
+
+    cache.set_cached("key 1", "cant translate")
+    cache.set_cached("key 3", "valor 3")
+    cache.remove_cached("key 6")
+    cache.save_cache()
+
+    # Copied ranges are not rescanned, yet the new header has the right count
+    stamp = cache._stamp(test_dir / "es.json")
+    store = CompactStore.open(test_dir / "es.snapshot", stamp)
+    monkeypatch.setattr(store, "_value_at", None)
+    assert store.count_value("cant translate") == 2
+    store.close()
+
+    assert cache.language_stats("es")["cant_translate"] == 2
@@ -0,0 +1,99 @@
+import json
+import time
+from pathlib import Path
+from src import cache, prefetch
+from src.main import app
+
+
+def wait_for_prefetch(timeout=5):
+    deadline = time.time() + timeout
+    while prefetch.pending_counts() and time.time() < deadline:
+        time.sleep(0.01)
+    assert not prefetch.pending_counts()
+
+
+def setup_test_cache(tmp_path: Path):
+    test_cache_dir = tmp_path / "translation_cache"
+    test_cache_dir.mkdir()
+    (test_cache_dir / "es.json").write_text(json.dumps({"Hello": "Hola"}))
+    return test_cache_dir
+
+
+def test_prefetch_only_translates_missing_strings(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(tmp_path)
+    monkeypatch.setattr(cache, "CACHE_DIR", test_dir)
+    monkeypatch.setattr(cache, "_active_lang", None)
+    monkeypatch.setattr(cache, "_active_cache", cache.CompactStore())
+
+    calls = []
+
+    def fake_fetch(word, lang):
+        calls.append((lang, word))
+        return f"{word}_{lang}"
+
+    monkeypatch.setattr(prefetch, "fetch_translation", fake_fetch)
+
+    queued = prefetch.enqueue(["Hello", "Bye", "Hi {{name}}"], ["es", "fr"])
+    assert queued == {"es": 2, "fr": 3}
+
+    wait_for_prefetch()
+
+    es = json.loads((test_dir / "es.json").read_text())
+    assert es == {"Hello": "Hola", "Bye": "Bye_es", "Hi __HB0__": "Hi __HB0___es"}
+
+    fr = json.loads((test_dir / "fr.json").read_text())
+    assert set(fr) == {"Hello", "Bye", "Hi __HB0__"}
+
+    assert ("es", "Hello") not in calls
+
+
+def test_prefetch_endpoint_accepts_arb_file(monkeypatch, tmp_path):
+    from io import BytesIO
+
+    test_dir = setup_test_cache(tmp_path)
+    monkeypatch.setattr(cache, "CACHE_DIR", test_dir)
+    monkeypatch.setattr(cache, "_active_lang", None)
+    monkeypatch.setattr(cache, "_active_cache", cache.CompactStore())
+    monkeypatch.setattr(prefetch, "fetch_translation", lambda word, lang: f"{word}_X")
+
+    arb = {"hello": "Hello", "title": "Title", "@title": {"description": "A title"}}
+
+    client = app.test_client()
+    resp = client.post(
+        "/cache/prefetch",
+        data={
+            "file": (BytesIO(json.dumps(arb).encode("utf-8")), "en.arb"),
+            "targets": "es",
+        },
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 202
+    assert resp.get_json()["queued"] == {"es": 1}
+
+    wait_for_prefetch()
+
+    es = json.loads((test_dir / "es.json").read_text())
+    assert es["Title"] == "Title_X"
+    assert "A title" not in es
+
+
+def test_prefetch_worker_survives_errors(monkeypatch, tmp_path):
+    test_dir = setup_test_cache(tmp_path)
+    monkeypatch.setattr(cache, "CACHE_DIR", test_dir)
+    monkeypatch.setattr(cache, "_active_lang", None)
+    monkeypatch.setattr(cache, "_active_cache", cache.CompactStore())
+
+    def broken_fetch(word, lang):
+        raise RuntimeError("grid unreachable")
+
+    monkeypatch.setattr(prefetch, "fetch_translation", broken_fetch)
+    assert prefetch.enqueue(["Bye", "Later"], ["es"]) == {"es": 2}
+    wait_for_prefetch()
+
+    # The keys were released, so the same strings can be queued again and succeed
+    monkeypatch.setattr(prefetch, "fetch_translation", lambda word, lang: f"{word}_ok")
+    assert prefetch.enqueue(["Bye", "Later"], ["es"]) == {"es": 2}
+    wait_for_prefetch()
+
+    es = json.loads((test_dir / "es.json").read_text())
+    assert es["Bye"] == "Bye_ok" and es["Later"] == "Later_ok"
@@ -0,0 +1,96 @@
+import json
+import time
+from io import BytesIO
+from pathlib import Path
+from src import cache, prefetch, translate
+from src.main import app
+
+
+def slow_translation(text, lang, deadline=None):
+    time.sleep(0.1)
+    return f"{text}_X"
+
+
+def test_expired_deadline_serves_cache_hits_only(monkeypatch):
+    cached = {"Cached __HB0__": "En caché __HB0__"}
+    monkeypatch.setattr(translate, "get_cached", cached.get)
+    monkeypatch.setattr(translate, "translate_preserving_handlebars", slow_translation)
+
+    deadline = translate.Deadline(0.05)
+    data = {"a": "First", "b": ["Second", "Cached {{name}}"], "c": 3}
+
+    translated = translate.translate_json_structure(data, "es", deadline)
+
+    # The first string started before the deadline; the rest only hit the cache
+    assert translated == {"a": "First_X", "b": ["Second", "En caché {{name}}"], "c": 3}
+    assert deadline.pending == ["Second"]
+
+    deadline = translate.Deadline(0, keep_source=False)
+    assert translate.translate_arb_structure({"a": "Second"}, "es", deadline=deadline) == {"a": None}
+
+
+def test_file_endpoint_returns_partial_result_and_finishes_in_background(monkeypatch, tmp_path):
+    test_dir = tmp_path / "translation_cache"
+    test_dir.mkdir()
+    monkeypatch.setattr(cache, "CACHE_DIR", test_dir)
+    monkeypatch.setattr(translate, "translate_preserving_handlebars", slow_translation)
+    monkeypatch.setattr(prefetch, "fetch_translation", lambda word, lang: f"{word}_BG")
+
+    client = app.test_client()
+    source = {"one": "One", "two": "Two", "three": "Three"}
+    resp = client.post(
+        "/translate-file/json",
+        data={
+            "file": (BytesIO(json.dumps(source).encode("utf-8")), "en.json"),
+            "target": "es",
+            "deadline": "0.05",
+        },
+        content_type="multipart/form-data",
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["X-Translation-Partial"] == "true"
+    assert resp.headers["X-Translation-Remaining"] == "2"
+    assert json.loads(resp.data) == {"one": "One_X", "two": "Two", "three": "Three"}
+
+    end = time.time() + 5
+    while prefetch.pending_counts() and time.time() < end:
+        time.sleep(0.01)
+
+    es = json.loads((test_dir / "es.json").read_text())
+    assert es["Two"] == "Two_BG" and es["Three"] == "Three_BG"
+
+
+def test_invalid_deadline_is_rejected():
+    client = app.test_client()
+    resp = client.post(
+        "/translate-file/json",
+        data={"file": (BytesIO(b"{}"), "en.json"), "target": "es", "deadline": "soon"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 400
+
+
+def test_deadline_stops_retries_without_caching_a_failure(monkeypatch):
+    cached = {}
+    attempts = []
+    deadline = translate.Deadline(60)
+
+    def failing_driver():
+        attempts.append(1)
+        # The session start eats the whole budget
+        deadline.expires_at = time.monotonic()
+        raise RuntimeError("session start timed out")
+
+    monkeypatch.setattr(translate, "get_cached", cached.get)
+    monkeypatch.setattr(translate, "set_cached", cached.__setitem__)
+    monkeypatch.setattr(translate, "create_driver", failing_driver)
+    monkeypatch.setattr(translate.time, "sleep", lambda seconds: None)
+
+    translated = translate.translate_json_structure({"a": "Slow {{name}}"}, "es", deadline)
+
+    # One attempt started before the deadline; the remaining retries were skipped
+    assert len(attempts) == 1
+    assert translated == {"a": "Slow {{name}}"}
+    assert deadline.pending == ["Slow {{name}}"]
+    assert "Slow __HB0__" not in cached
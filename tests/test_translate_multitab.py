@@ -0,0 +1,74 @@
+from src import translate
+
+
+class FakeDriver:
+    """Stands in for a WebDriver session; 'Broken' never renders a result."""
+
+    def __init__(self, log):
+        self.log = log
+        self.tabs = []
+
+    def get(self, url):
+        self.log.append(("get", url))
+
+    def execute_script(self, script, *args):
+        if script == translate.OPEN_TABS_SCRIPT:
+            self.tabs = list(args[0])
+            self.log.append(("open", len(self.tabs)))
+        elif script == translate.HARVEST_TABS_SCRIPT:
+            self.log.append(("harvest", len(self.tabs)))
+            return ["" if "Broken" in url else "T:" + url.split("text=")[1].split("&")[0] for url in self.tabs]
+        elif script == translate.CLOSE_TABS_SCRIPT:
+            self.tabs = []
+
+    def quit(self):
+        self.log.append(("quit",))
+
+
+def test_fetch_translations_uses_one_session_per_attempt(monkeypatch):
+    log = []
+    monkeypatch.setattr(translate, "create_driver", lambda: FakeDriver(log))
+    monkeypatch.setattr(translate.time, "sleep", lambda seconds: None)
+
+    results = translate.fetch_translations(["One", "Two", "Three", "Broken"], "es", tabs=3, attempts=2)
+
+    assert results == {"One": "T:One", "Two": "T:Two", "Three": "T:Three", "Broken": "cant translate"}
+
+    # Attempt 1: 4 words in chunks of 3 + 1, one harvest per chunk
+    # Attempt 2: only the failed word is retried
+    assert [entry for entry in log if entry[0] == "harvest"] == [("harvest", 3), ("harvest", 1), ("harvest", 1)]
+    assert log.count(("quit",)) == 2
+
+
+def test_prefill_cache_only_fetches_misses(monkeypatch):
+    cached = {"Hello": "Hola"}
+    requested = []
+
+    def fake_fetch(words, lang, tabs, deadline=None):
+        requested.extend(words)
+        return {w: f"{w}_X" for w in words}
+
+    monkeypatch.setattr(translate, "missing_keys", lambda lang, keys: [k for k in keys if k not in cached])
+    monkeypatch.setattr(translate, "set_cached", cached.__setitem__)
+    monkeypatch.setattr(translate, "fetch_translations", fake_fetch)
+
+    translate.prefill_cache(["Hello", "Hi {{name}}", "Bye", "Bye"], "es", tabs=4)
+
+    assert requested == ["Hi __HB0__", "Bye"]
+    assert cached["Bye"] == "Bye_X"
+
+    # Single-tab mode leaves the per-string path untouched
+    requested.clear()
+    translate.prefill_cache(["New"], "es", tabs=1)
+    assert requested == []
+
+
+def test_session_errors_count_as_failed_attempts(monkeypatch):
+    def unreachable():
+        raise RuntimeError("grid unreachable")
+
+    monkeypatch.setattr(translate, "create_driver", unreachable)
+    monkeypatch.setattr(translate.time, "sleep", lambda seconds: None)
+
+    assert translate.fetch_translation("Hello", "es", attempts=2) == "cant translate"
+    assert translate.fetch_translations(["Hello"], "es", tabs=2, attempts=2) == {"Hello": "cant translate"}